@@ -1,165 +1,261 @@
+import re
 import tkinter as tk
 from tkinter import messagebox, filedialog
-import matplotlib.pyplot as plt
+import numpy as np
 
 # X-coordinates for half-lane (including tire regions).
 X_COORDS = [0.0, 0.475, 0.725, 2.275, 2.525, 3.0]
+X_COORDS_ARR = np.array(X_COORDS, dtype=np.float64)
+
+# Resolution used when the plot is saved from its window. Only the
+# grid lines and nodes are rasterized; axes and labels stay vector.
+SAVEFIG_DPI = 300
+
+# Layer keys (top to bottom) for each pavement type.
+_LAYER_KEYS = {
+    "Flexible": ("surface", "binder", "base", "subbase"),
+    "Rigid": ("rigid_slab", "rigid_subbase"),
+    "Semi-Rigid": ("asphalt", "ctb", "semirigid_subbase")
+}
+
+def _grid_nodes_loop(x_coords, thicknesses):
+    """
+    Fill an (N, 3) array of (x, y, 0) nodes, one row of x_coords
+    at y=0 and then one more below each thickness.
+    Written as plain loops so Numba can compile it.
+    """
+    n_x = x_coords.shape[0]
+    out = np.zeros(((thicknesses.shape[0] + 1) * n_x, 3))
+    current_y = 0.0
+    for i in range(thicknesses.shape[0] + 1):
+        if i > 0:
+            current_y -= thicknesses[i - 1]
+        for j in range(n_x):
+            out[i * n_x + j, 0] = x_coords[j]
+            out[i * n_x + j, 1] = current_y
+    return out
+
+def _grid_nodes_numpy(x_coords, thicknesses):
+    """
+    Same nodes as _grid_nodes_loop, built with numpy.meshgrid.
+    """
+    # Start the sum from 0.0 (as the loop does) so a zero first layer
+    # gives 0.0, not -0.0
+    y_coords = np.cumsum(np.concatenate(([0.0], -thicknesses)))
+
+    xv, yv = np.meshgrid(x_coords, y_coords)
+    pts = np.stack([xv, yv, np.zeros_like(xv)], axis=-1)
+    return pts.reshape(-1, 3)
+
+# Node grid builder, chosen on first use by _get_core_nodes()
+_core_nodes = None
+
+def _get_core_nodes():
+    """
+    Return the node grid builder: _grid_nodes_loop compiled by Numba
+    if it is installed, else _grid_nodes_numpy. Numba is only imported
+    (and the loop compiled, or loaded from its disk cache) the first
+    time nodes are generated, so it does not slow down start-up.
+    """
+    global _core_nodes
+    if _core_nodes is None:
+        try:
+            from numba import njit
+        except ImportError:  # Numba is optional; fall back to plain numpy
+            _core_nodes = _grid_nodes_numpy
+        else:
+            _core_nodes = njit("float64[:, :](float64[:], float64[:])",
+                               cache=True)(_grid_nodes_loop)
+    return _core_nodes
 
 def generate_pavement_nodes(pavement_type, layers):
     """
     Generate nodes for the chosen pavement type and layer thicknesses.
     We automatically add 1.5 m for the subgrade below the final layer.
+    Layers too thin to move y (zero, or below float resolution) repeat
+    the row above; those repeated rows are dropped, so every node is
+    unique. Raises ValueError if any thickness is negative.
     
     Returns a tuple:
       (nodes, col_lines, row_lines)
-      where 'nodes' is a set of (x, y, 0),
-            col_lines/row_lines are for plotting.
+      where 'nodes' is an (N, 3) array of (x, y, 0) rows,
+            col_lines/row_lines are (n, 3) arrays for plotting.
     """
-    # Build Y-coordinates from y=0 downward
-    y_coords = [0.0]
-
-    if pavement_type == "Flexible":
-        thicknesses = [
-            layers["surface"],
-            layers["binder"],
-            layers["base"],
-            layers["subbase"]
-        ]
-    elif pavement_type == "Rigid":
-        thicknesses = [
-            layers["rigid_slab"],
-            layers["rigid_subbase"]
-        ]
-    else:  # "Semi-Rigid"
-        thicknesses = [
-            layers["asphalt"],
-            layers["ctb"],
-            layers["semirigid_subbase"]
-        ]
-
-    current_y = 0.0
-    for t in thicknesses:
-        current_y -= t
-        y_coords.append(current_y)
-
-    # Add 1.5 m for the subgrade
-    current_y -= 1.5
-    y_coords.append(current_y)
-
-    # Create set of nodes
-    nodes = set()
-    for y in y_coords:
-        for x in X_COORDS:
-            nodes.add((x, y, 0.0))
-
-    # Build lines for plotting
-    col_lines = []
-    for x in X_COORDS:
-        col_line = [(x, y, 0.0) for y in y_coords]
-        col_lines.append(col_line)
-
-    row_lines = []
-    for y in y_coords:
-        row_line = [(x, y, 0.0) for x in X_COORDS]
-        row_lines.append(row_line)
+    thicknesses = [layers[k] for k in _LAYER_KEYS[pavement_type]]
+    if any(t < 0 for t in thicknesses):
+        raise ValueError("Layer thicknesses cannot be negative.")
+
+    # Add 1.5 m for the subgrade, then build nodes from y=0 downward
+    t_arr = np.array(thicknesses + [1.5], dtype=np.float64)
+    nodes = _get_core_nodes()(X_COORDS_ARR, t_arr)
+    pts = nodes.reshape(-1, len(X_COORDS_ARR), 3)
+
+    # Drop node rows at the same depth as the row above
+    y = pts[:, 0, 1]
+    keep = np.concatenate(([True], np.diff(y) != 0))
+    if not keep.all():
+        pts = pts[keep]
+        nodes = pts.reshape(-1, 3)
+
+    # Lines for plotting are just slices of the grid
+    col_lines = [pts[:, j, :] for j in range(len(X_COORDS_ARR))]
+    row_lines = list(pts)
 
     return nodes, col_lines, row_lines
 
-def write_to_text(file_path, nodes_list):
+def write_to_text(file_path, node_arr):
     """
-    Writes the file with the first line '/PREP7', 
+    Writes the file with the first line '/PREP7',
     then lines of the form 'N,nodeID,x,y,0'.
+
+    'node_arr' is an (N, 4) array with columns (id, x, y, z).
     """
-    with open(file_path, "w") as f:
+    # repr gives the shortest text that reads back as the same float;
+    # a 1 MiB buffer batches the per-line writes into few OS writes
+    with open(file_path, "w", buffering=1 << 20) as f:
         f.write("/PREP7\n")
-        for nid, x, y, z in nodes_list:
-            f.write(f"N,{nid},{x},{y},{z}\n")
+        f.writelines(f"N,{int(n)},{x!r},{y!r},{z!r}\n"
+                     for n, x, y, z in node_arr.tolist())
 
-def plot_pavement(col_lines, row_lines):
+def _label_visible_nodes(ax, nodes):
+    """
+    Label nodes with their (x,y), but only those inside the current
+    view. Labels are created on first sight and then shown/hidden
+    as the view is zoomed or panned, never recreated.
+    """
+    labels = {}
+
+    def update(ax):
+        x0, x1 = sorted(ax.get_xlim())
+        y0, y1 = sorted(ax.get_ylim())
+        visible = ((nodes[:, 0] >= x0) & (nodes[:, 0] <= x1)
+                   & (nodes[:, 1] >= y0) & (nodes[:, 1] <= y1))
+        for i in np.flatnonzero(visible):
+            if i not in labels:
+                x, y = nodes[i, 0], nodes[i, 1]
+                # Format with 2 decimal places, small offset for readability
+                labels[i] = ax.annotate(
+                    f"({x:.2f}, {y:.2f})",
+                    (x, y),
+                    xytext=(3, 3),
+                    textcoords="offset points",
+                    fontsize=8
+                )
+        for i, label in labels.items():
+            label.set_visible(visible[i])
+
+    ax.callbacks.connect("xlim_changed", update)
+    ax.callbacks.connect("ylim_changed", update)
+    update(ax)
+
+def plot_pavement(nodes, col_lines, row_lines, annotate=False):
     """
     Simple 2D plot of the pavement 'grid' using matplotlib.
+    Grid lines and nodes are rasterized (at SAVEFIG_DPI when saved);
+    pass annotate=True to also label the nodes in view with their (x,y).
     """
-    plt.figure()
-    # Plot vertical lines
-    for col in col_lines:
-        xs = [p[0] for p in col]
-        ys = [p[1] for p in col]
-        plt.plot(xs, ys, marker='o')
-    
-    # Plot horizontal lines
-    for row in row_lines:
-        xs = [p[0] for p in row]
-        ys = [p[1] for p in row]
-        plt.plot(xs, ys, marker='o')
-
-    plt.title("Pavement Cross-Section Nodes")
-    plt.xlabel("X (m)")
-    plt.ylabel("Y (m, negative down)")
-    plt.gca().invert_yaxis()  # top layer at y=0
-    plt.axis("equal")
-    plt.grid(True)
-    plt.show()
+    # Imported here so the GUI starts without loading matplotlib
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+
+    # plt.show() blocks, so saves from the window happen inside this context
+    with plt.rc_context({"savefig.dpi": SAVEFIG_DPI}):
+        fig, ax = plt.subplots()
+        # Vertical and horizontal grid lines as one collection,
+        # each line reduced to its two end points
+        segs = [(line[0, :2], line[-1, :2]) for line in col_lines + row_lines]
+        lines = LineCollection(segs, linewidths=0.8)
+        lines.set_rasterized(True)
+        ax.add_collection(lines)
+
+        # All nodes in a single artist
+        ax.scatter(nodes[:, 0], nodes[:, 1], s=12, zorder=3, rasterized=True)
+
+        ax.set_title("Pavement Cross-Section Nodes")
+        ax.set_xlabel("X (m)")
+        ax.set_ylabel("Y (m, negative down)")
+        ax.invert_yaxis()  # top layer at y=0
+        ax.axis("equal")
+        ax.grid(True)
+        if annotate:
+            _label_visible_nodes(ax, nodes)
+        plt.show()
+
+# Pavement type whose fields are currently shown (None until first change)
+_current_ptype = None
 
 def on_pavement_change(*args):
     """
     Called whenever the pavement type dropdown changes.
-    Show/hide the relevant entry fields for the chosen type.
+    Show/hide the relevant entry fields for the chosen type;
+    each type's fields live in one frame, so this is one call each way.
     """
+    global _current_ptype
     ptype = pavement_type_var.get()
+    if ptype == _current_ptype:
+        return
 
-    # Hide all first
-    for w in flexible_widgets + rigid_widgets + semirigid_widgets:
-        w.grid_remove()
+    # Hide the previously shown fields
+    if _current_ptype in pavement_frames:
+        pavement_frames[_current_ptype].grid_remove()
 
     # Show relevant fields
-    if ptype == "Flexible":
-        for w in flexible_widgets:
-            w.grid()
-    elif ptype == "Rigid":
-        for w in rigid_widgets:
-            w.grid()
-    elif ptype == "Semi-Rigid":
-        for w in semirigid_widgets:
-            w.grid()
+    if ptype in pavement_frames:
+        pavement_frames[ptype].grid()
+
+    _current_ptype = ptype
+
+def _floats(varlist):
+    """
+    Read each Tk variable once and parse it as a float.
+    Raises ValueError if any entry is not a number.
+    """
+    return [float(v.get()) for v in varlist]
+
+# A non-negative decimal, possibly still being typed (e.g. "", ".", "1e-").
+# ASCII digits only.
+_THICKNESS_RE = re.compile(r"[0-9]*(\.[0-9]*)?([eE][+-]?[0-9]*)?")
+
+def _is_thickness(text):
+    """
+    Entry validator: accept only text that is, or is on its way to
+    being, a non-negative decimal number.
+    """
+    return _THICKNESS_RE.fullmatch(text) is not None
 
 def on_generate():
     # 1) Check which pavement type
     ptype = pavement_type_var.get()
-    if ptype not in ("Flexible", "Rigid", "Semi-Rigid"):
+    if ptype not in _LAYER_KEYS:
         messagebox.showerror("Error", "Please select a pavement type.")
         return
 
     # 2) Gather thickness inputs
+    keys = _LAYER_KEYS[ptype]
     try:
-        if ptype == "Flexible":
-            layers = {
-                "surface": float(surface_var.get()),
-                "binder": float(binder_var.get()),
-                "base": float(base_var.get()),
-                "subbase": float(subbase_var.get())
-            }
-        elif ptype == "Rigid":
-            layers = {
-                "rigid_slab": float(rigid_slab_var.get()),
-                "rigid_subbase": float(rigid_subbase_var.get())
-            }
-        else:  # "Semi-Rigid"
-            layers = {
-                "asphalt": float(asphalt_var.get()),
-                "ctb": float(ctb_var.get()),
-                "semirigid_subbase": float(semirigid_subbase_var.get())
-            }
+        layers = dict(zip(keys, _floats(layer_vars[k] for k in keys)))
     except ValueError:
         messagebox.showerror("Error", "Please enter valid numeric thicknesses.")
         return
 
+    # Huge exponents (e.g. 1e400) parse to inf, which is not a thickness
+    if not all(np.isfinite(t) for t in layers.values()):
+        messagebox.showerror("Error", "Please enter valid numeric thicknesses.")
+        return
+
+    # Negative layers would give out-of-order node rows
+    if any(t < 0 for t in layers.values()):
+        messagebox.showerror("Error", "Layer thicknesses cannot be negative.")
+        return
+
     # 3) Generate nodes
     nodes, col_lines, row_lines = generate_pavement_nodes(ptype, layers)
 
     # 4) Sort so top row (y=0) is first, left to right, 
     #    then proceed downward:
-    sorted_nodes = sorted(nodes, key=lambda p: (-p[1], p[0]))
-    node_list = [(i+1, x, y, z) for i, (x, y, z) in enumerate(sorted_nodes)]
+    order = np.lexsort((nodes[:, 0], -nodes[:, 1]))
+    sorted_nodes = nodes[order]
+    node_list = np.column_stack([np.arange(1, len(nodes) + 1), sorted_nodes])
 
     # 5) Ask user where to save
     file_path = filedialog.asksaveasfilename(
@@ -176,12 +272,15 @@ def on_generate():
     messagebox.showinfo("Success", f"Pavement nodes saved to:\n{file_path}")
 
     # 7) Plot
-    plot_pavement(col_lines, row_lines)
+    plot_pavement(nodes, col_lines, row_lines)
 
 # ---------------- Build the GUI with explicit row placements ----------------
 root = tk.Tk()
 root.title("ANSYS Pavement Node Generator")
 
+# Thickness entries reject anything but non-negative decimals as typed
+thickness_vcmd = (root.register(_is_thickness), "%P")
+
 # Pavement type
 pavement_type_var = tk.StringVar(value="Flexible")
 pavement_type_var.trace_add("write", on_pavement_change)
@@ -195,93 +294,109 @@ ptype_menu.grid(row=0, column=1, padx=5, pady=5, sticky="w")
 #
 # Flexible
 #
-surface_label = tk.Label(root, text="Surface thickness (m):")
+flexible_frame = tk.Frame(root)
+
+surface_label = tk.Label(flexible_frame, text="Surface thickness (m):")
 surface_var = tk.StringVar(value="0.06")
-surface_entry = tk.Entry(root, textvariable=surface_var, width=8)
+surface_entry = tk.Entry(flexible_frame, textvariable=surface_var, width=8, validate="key", validatecommand=thickness_vcmd)
 
-binder_label = tk.Label(root, text="Binder thickness (m):")
+binder_label = tk.Label(flexible_frame, text="Binder thickness (m):")
 binder_var = tk.StringVar(value="0.08")
-binder_entry = tk.Entry(root, textvariable=binder_var, width=8)
+binder_entry = tk.Entry(flexible_frame, textvariable=binder_var, width=8, validate="key", validatecommand=thickness_vcmd)
 
-base_label = tk.Label(root, text="Base thickness (m):")
+base_label = tk.Label(flexible_frame, text="Base thickness (m):")
 base_var = tk.StringVar(value="0.20")
-base_entry = tk.Entry(root, textvariable=base_var, width=8)
+base_entry = tk.Entry(flexible_frame, textvariable=base_var, width=8, validate="key", validatecommand=thickness_vcmd)
 
-subbase_label = tk.Label(root, text="Subbase thickness (m):")
+subbase_label = tk.Label(flexible_frame, text="Subbase thickness (m):")
 subbase_var = tk.StringVar(value="0.20")
-subbase_entry = tk.Entry(root, textvariable=subbase_var, width=8)
+subbase_entry = tk.Entry(flexible_frame, textvariable=subbase_var, width=8, validate="key", validatecommand=thickness_vcmd)
 
 # place them on separate rows, columns 0 and 1
-surface_label.grid(row=1, column=0, padx=5, pady=2, sticky="e")
-surface_entry.grid(row=1, column=1, padx=5, pady=2, sticky="w")
+surface_label.grid(row=0, column=0, padx=5, pady=2, sticky="e")
+surface_entry.grid(row=0, column=1, padx=5, pady=2, sticky="w")
 
-binder_label.grid(row=2, column=0, padx=5, pady=2, sticky="e")
-binder_entry.grid(row=2, column=1, padx=5, pady=2, sticky="w")
+binder_label.grid(row=1, column=0, padx=5, pady=2, sticky="e")
+binder_entry.grid(row=1, column=1, padx=5, pady=2, sticky="w")
 
-base_label.grid(row=3, column=0, padx=5, pady=2, sticky="e")
-base_entry.grid(row=3, column=1, padx=5, pady=2, sticky="w")
+base_label.grid(row=2, column=0, padx=5, pady=2, sticky="e")
+base_entry.grid(row=2, column=1, padx=5, pady=2, sticky="w")
 
-subbase_label.grid(row=4, column=0, padx=5, pady=2, sticky="e")
-subbase_entry.grid(row=4, column=1, padx=5, pady=2, sticky="w")
+subbase_label.grid(row=3, column=0, padx=5, pady=2, sticky="e")
+subbase_entry.grid(row=3, column=1, padx=5, pady=2, sticky="w")
 
-flexible_widgets = [surface_label, surface_entry,
-                    binder_label, binder_entry,
-                    base_label, base_entry,
-                    subbase_label, subbase_entry]
+flexible_frame.grid(row=1, column=0, columnspan=2, rowspan=4, sticky="ne")
 
 #
 # Rigid
 #
-rigid_slab_label = tk.Label(root, text="Concrete slab thickness (m):")
+rigid_frame = tk.Frame(root)
+
+rigid_slab_label = tk.Label(rigid_frame, text="Concrete slab thickness (m):")
 rigid_slab_var = tk.StringVar(value="0.20")
-rigid_slab_entry = tk.Entry(root, textvariable=rigid_slab_var, width=8)
+rigid_slab_entry = tk.Entry(rigid_frame, textvariable=rigid_slab_var, width=8, validate="key", validatecommand=thickness_vcmd)
 
-rigid_subbase_label = tk.Label(root, text="Subbase thickness (m):")
+rigid_subbase_label = tk.Label(rigid_frame, text="Subbase thickness (m):")
 rigid_subbase_var = tk.StringVar(value="0.20")
-rigid_subbase_entry = tk.Entry(root, textvariable=rigid_subbase_var, width=8)
+rigid_subbase_entry = tk.Entry(rigid_frame, textvariable=rigid_subbase_var, width=8, validate="key", validatecommand=thickness_vcmd)
 
-rigid_slab_label.grid(row=1, column=2, padx=5, pady=2, sticky="e")
-rigid_slab_entry.grid(row=1, column=3, padx=5, pady=2, sticky="w")
+rigid_slab_label.grid(row=0, column=0, padx=5, pady=2, sticky="e")
+rigid_slab_entry.grid(row=0, column=1, padx=5, pady=2, sticky="w")
 
-rigid_subbase_label.grid(row=2, column=2, padx=5, pady=2, sticky="e")
-rigid_subbase_entry.grid(row=2, column=3, padx=5, pady=2, sticky="w")
+rigid_subbase_label.grid(row=1, column=0, padx=5, pady=2, sticky="e")
+rigid_subbase_entry.grid(row=1, column=1, padx=5, pady=2, sticky="w")
 
-rigid_widgets = [rigid_slab_label, rigid_slab_entry,
-                 rigid_subbase_label, rigid_subbase_entry]
+rigid_frame.grid(row=1, column=2, columnspan=2, rowspan=2, sticky="nw")
 
 #
 # Semi-Rigid
 #
-asphalt_label = tk.Label(root, text="Asphalt layer thickness (m):")
+semirigid_frame = tk.Frame(root)
+
+asphalt_label = tk.Label(semirigid_frame, text="Asphalt layer thickness (m):")
 asphalt_var = tk.StringVar(value="0.08")
-asphalt_entry = tk.Entry(root, textvariable=asphalt_var, width=8)
+asphalt_entry = tk.Entry(semirigid_frame, textvariable=asphalt_var, width=8, validate="key", validatecommand=thickness_vcmd)
 
-ctb_label = tk.Label(root, text="Cement treated base (m):")
+ctb_label = tk.Label(semirigid_frame, text="Cement treated base (m):")
 ctb_var = tk.StringVar(value="0.20")
-ctb_entry = tk.Entry(root, textvariable=ctb_var, width=8)
+ctb_entry = tk.Entry(semirigid_frame, textvariable=ctb_var, width=8, validate="key", validatecommand=thickness_vcmd)
 
-semirigid_subbase_label = tk.Label(root, text="Subbase thickness (m):")
+semirigid_subbase_label = tk.Label(semirigid_frame, text="Subbase thickness (m):")
 semirigid_subbase_var = tk.StringVar(value="0.20")
-semirigid_subbase_entry = tk.Entry(root, textvariable=semirigid_subbase_var, width=8)
+semirigid_subbase_entry = tk.Entry(semirigid_frame, textvariable=semirigid_subbase_var, width=8, validate="key", validatecommand=thickness_vcmd)
+
+asphalt_label.grid(row=0, column=0, padx=5, pady=2, sticky="e")
+asphalt_entry.grid(row=0, column=1, padx=5, pady=2, sticky="w")
+
+ctb_label.grid(row=1, column=0, padx=5, pady=2, sticky="e")
+ctb_entry.grid(row=1, column=1, padx=5, pady=2, sticky="w")
 
-asphalt_label.grid(row=3, column=2, padx=5, pady=2, sticky="e")
-asphalt_entry.grid(row=3, column=3, padx=5, pady=2, sticky="w")
+semirigid_subbase_label.grid(row=2, column=0, padx=5, pady=2, sticky="e")
+semirigid_subbase_entry.grid(row=2, column=1, padx=5, pady=2, sticky="w")
 
-ctb_label.grid(row=4, column=2, padx=5, pady=2, sticky="e")
-ctb_entry.grid(row=4, column=3, padx=5, pady=2, sticky="w")
+semirigid_frame.grid(row=3, column=2, columnspan=2, rowspan=3, sticky="nw")
 
-semirigid_subbase_label.grid(row=5, column=2, padx=5, pady=2, sticky="e")
-semirigid_subbase_entry.grid(row=5, column=3, padx=5, pady=2, sticky="w")
+pavement_frames = {
+    "Flexible": flexible_frame,
+    "Rigid": rigid_frame,
+    "Semi-Rigid": semirigid_frame
+}
 
-semirigid_widgets = [
-    asphalt_label, asphalt_entry,
-    ctb_label, ctb_entry,
-    semirigid_subbase_label, semirigid_subbase_entry
-]
+layer_vars = {
+    "surface": surface_var,
+    "binder": binder_var,
+    "base": base_var,
+    "subbase": subbase_var,
+    "rigid_slab": rigid_slab_var,
+    "rigid_subbase": rigid_subbase_var,
+    "asphalt": asphalt_var,
+    "ctb": ctb_var,
+    "semirigid_subbase": semirigid_subbase_var
+}
 
 # Initially hide all
-for w in flexible_widgets + rigid_widgets + semirigid_widgets:
-    w.grid_remove()
+for frame in pavement_frames.values():
+    frame.grid_remove()
 
 # Generate button at the bottom
 generate_button = tk.Button(root, text="Generate Pavement Nodes", command=on_generate)